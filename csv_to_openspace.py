@@ -34,13 +34,28 @@ can also have a custom glyph/texture, which (I think) is not available for stars
 """
 
 import argparse
+import numpy as np
 import pandas as pd
 from glob import glob
 import shutil
 import os
 import math
+import multiprocessing
 from pathlib import Path
 
+# pyarrow is optional. If it's available, the points CSV files are read with its CSV
+# parser, which is multithreaded and a good deal faster than pandas' default C parser
+# on big files. Without it, the C parser is told to use its round-trip float
+# converter: its default one can be a bit off in the last digit, and the centroids
+# written into the asset files would then depend on which parser was used.
+try:
+    import pyarrow
+    points_csv_engine = "pyarrow"
+    points_csv_options = {"engine": "pyarrow"}
+except ImportError:
+    points_csv_engine = "c"
+    points_csv_options = {"engine": "c", "float_precision": "round_trip"}
+
 parser = argparse.ArgumentParser(description="Process input CSV files for OpenSpace.")
 parser.add_argument("-i", "--input_dataset_csv_file", help="Input dataset CSV file.", 
                     required=True)
@@ -48,78 +63,345 @@ parser.add_argument("-c", "--cache_dir", help="OpenSpace cache directory.",
                     required=True)
 parser.add_argument("-a", "--asset_dir", help="OpenSpace directory for assets.",
                     required=True)
-parser.add_argument("-o", "--output_dir", help="Directory for local copy of output files.",
-                    default=".")
+parser.add_argument("-o", "--output_dir", help="Directory for local copy of output files. "
+                    "If not given, files are written straight into the asset directory.",
+                    default=None)
 parser.add_argument("-v", "--verbose", help="Verbose output.", action="store_true")
 args = parser.parse_args()
 
+# Without a local copy, there's no point writing the files somewhere else and copying
+# them over, so write them into the asset directory directly.
+if args.output_dir is None:
+    args.output_dir = args.asset_dir
+
+# The speck file header is the same for every speck file. It's bytes, since speck
+# files are written in binary mode.
+SPECK_HEADER = (b"datavar 0 colorb_v\n"
+                b"datavar 1 lum\n"
+                b"datavar 2 absmag\n"
+                b"datavar 3 appmag\n"
+                b"datavar 4 texnum\n"
+                b"datavar 5 distly\n"
+                b"datavar 6 dcalc\n"
+                b"datavar 7 plx\n"
+                b"datavar 8 plxerr\n"
+                b"datavar 9 vx\n"
+                b"datavar 10 vy\n"
+                b"datavar 11 vz\n"
+                b"datavar 12 speed\n"
+                b"texturevar 4\n"
+                b"texture -M 1 halo.sgi\n")
+
+# The colormap files are the same every time, so they're kept as constants and written
+# in one go. The stars one is still a placeholder (a hack, really). The points one only
+# has two colors for now; eventually it should have one per unique value of the
+# color_by_column.
+STARS_CMAP = ("# OpenSpace colormap file\n"
+              "\n"
+              "5\n"
+              "1.0 1.0 1.0 0.5\n"
+              "1.0 0.0 0.0 1.0\n"
+              "0.0 1.0 0.0 1.0\n"
+              "0.0 0.0 1.0 1.0\n"
+              "1.0 1.0 1.0 1.0\n")
+
+POINTS_CMAP = ("# OpenSpace colormap file\n"
+               "\n"
+               "2\n"
+               "0.0 0.0 1.0 1.0\n"
+               "0.0 1.0 0.0 1.0\n")
+
+# Templates for the asset files. These are filled in with str.format(), so literal Lua
+# braces are doubled. The optional fade parts ({fade_command}, {fade_hooks},
+# {register_action} and {remove_action}) are either empty or complete lines, see
+# make_fade_template_fields().
+
+FADE_COMMAND_TEMPLATE = """\
+local {fade_varname} = {{
+    Identifier = "{fade_varname}",
+    Name = "{fade_varname}",
+    Command = [[
+      openspace.printInfo("Node: " .. args.Node)
+      openspace.printInfo("Transition: " .. args.Transition)
+
+      if args.Transition == "Approaching" then
+{fade_in_lines}
+      elseif args.Transition == "Exiting" then
+{fade_out_lines}
+      end
+    ]],
+    IsLocal = true
+}}
+"""
+
+FADE_HOOKS_TEMPLATE = """\
+    OnApproach = {{ "{fade_varname}" }},
+    OnReach = {{ "{fade_varname}" }},
+    OnRecede = {{ "{fade_varname}" }},
+    OnExit = {{ "{fade_varname}" }},
+"""
+
+# The "Stars Color Table" resource (stars_colormap, Version 3) is left out of here; the
+# asset uses the .cmap file written by make_stars_asset_from_dataframe() instead.
+STARS_ASSET_TEMPLATE = """\
+local sunspeck = asset.resource({{
+  Name = "Stars Speck Files",
+  Type = "HttpSynchronization",
+  Identifier = "digitaluniverse_sunstar_speck",
+  Version = 1
+}})
+
+local textures = asset.resource({{
+  Name = "Stars Textures",
+  Type = "HttpSynchronization",
+  Identifier = "stars_textures",
+  Version = 1
+}})
+
+{fade_command}local meters_in_pc = 3.0856775814913673e+16
+local {position_name} = {{
+    Identifier = "{position_name}",
+  Transform = {{
+    Translation = {{
+      Type = "StaticTranslation",
+      Position = {{
+        {x} * meters_in_pc,
+        {y} * meters_in_pc,
+        {z} * meters_in_pc,
+      }}
+     }}
+    }},
+  GUI = {{
+    Name = "{position_name}",
+    Path = "/Positions",
+    Hidden = true
+  }}
+}}
+local {base}_speck = asset.resource("{base}.speck")
+local {base}_color = asset.resource("{cmap_filename}")
+
+local {base} = {{
+  Identifier = "{base}",
+  Parent = {position_name}.Identifier,
+  Renderable = {{
+    UseCaching = false,
+    Type = "RenderableStars",
+    File = {base}_speck,
+    Core = {{
+      Texture = textures .. "glare.png",
+      Multiplier = {core_multiplier},
+      Gamma = {core_gamma},
+      Scale = {core_scale}
+    }},
+    Glare = {{
+      Texture = textures .. "halo.png",
+      Multiplier = {glare_multiplier},
+      Gamma = {glare_gamma},
+      Scale = {glare_scale}
+    }},
+    MagnitudeExponent = {magnitude_exponent},
+    ColorMap = {base}_color,
+     ColorOption = "Other Data",
+    OtherData = "texnum",
+    OtherDataColorMap = {base}_color,
+    OtherDataValueRange = {{ 0.0, 4.0 }},
+    SizeComposition = "Distance Modulus",
+    DataMapping = {{
+      Bv = "colorb_v",
+      Luminance = "lum",
+      AbsoluteMagnitude = "absmag",
+      ApparentMagnitude = "appmag",
+      Vx = "vx",
+      Vy = "vy",
+      Vz = "vz",
+      Speed = "speed"
+    }},
+    DimInAtmosphere = true
+  }},
+    InteractionSphere = 1 * meters_in_pc,
+    ApproachFactor = 1000.0,
+    ReachFactor = 5.0,
+
+{fade_hooks}  GUI = {{
+    Name = "{base}",
+    Path = "/Stars",
+  }}
+}}
+asset.onInitialize(function()
+{register_action}  openspace.addSceneGraphNode({position_name})
+  openspace.addSceneGraphNode({base})
+end)
+asset.onDeinitialize(function()
+  openspace.removeSceneGraphNode({base})
+  openspace.removeSceneGraphNode({position_name})
+{remove_action}end)
+asset.export({position_name})
+asset.export({base})
+"""
+
+# For a fixed color instead of the colormap, use
+# Coloring = { FixedColor = { 1.0, 0.0, 0.0 } },
+POINTS_ASSET_TEMPLATE = """\
+{fade_command}local meters_in_pc = 3.0856775814913673e+16
+local {position_name} = {{
+    Identifier = "{position_name}",
+  Transform = {{
+    Translation = {{
+      Type = "StaticTranslation",
+      Position = {{
+        {x} * meters_in_pc,
+        {y} * meters_in_pc,
+        {z} * meters_in_pc,
+      }}
+     }}
+    }},
+  GUI = {{
+    Name = "{position_name}",
+    Path = "/Points",
+    Hidden = true
+  }}
+ }}
+local {variable_name} = {{
+    Identifier = "{variable_name}",
+    Parent = {position_name}.Identifier,
+    Renderable = {{
+        Type = "RenderablePointCloud",
+        File = asset.resource("{points_csv_filename}"),
+         Texture = {{ File = asset.resource("point3A.png") }},
+         Unit = "pc",
+        Coloring = {{ ColorMapping = {{ File = asset.resource("{color_filename}"),
+                                      Parameter = "color" }} }},
+    }},
+    InteractionSphere = 1 * meters_in_pc,
+    ApproachFactor = 1000.0,
+    ReachFactor = 5.0,
+{fade_hooks}    GUI = {{
+        Name = "{variable_name}",
+        Path = "/Points"
+    }}
+}}
+asset.onInitialize(function()
+{register_action}    openspace.addSceneGraphNode({position_name});
+    openspace.addSceneGraphNode({variable_name});
+end)
+asset.onDeinitialize(function()
+    openspace.removeSceneGraphNode({variable_name});
+    openspace.removeSceneGraphNode({position_name});
+{remove_action}end)
+asset.export({position_name})
+asset.export({variable_name})
+"""
+
+LABELS_ASSET_TEMPLATE = """\
+local meters_in_pc = 3.0856775814913673e+16
+local {position_name} = {{
+    Identifier = "{position_name}",
+  Transform = {{
+    Translation = {{
+      Type = "StaticTranslation",
+      Position = {{
+        {x} * meters_in_pc,
+        {y} * meters_in_pc,
+        {z} * meters_in_pc,
+      }}
+     }}
+    }},
+  GUI = {{
+    Name = "{position_name}",
+    Path = "/Positions",
+    Hidden = true
+  }}
+ }}
+local {variable_name} = {{
+    Identifier = "{variable_name}",
+    Parent = {position_name}.Identifier,
+    Renderable = {{
+        Type = "RenderablePointCloud",
+        Labels = {{
+            File = asset.resource("{label_filename}"),
+            Enabled = {enabled},
+            Unit = "pc",
+            Size = {label_size},
+            MinMaxSize = {{ {label_minsize},{label_maxsize} }}
+        }}
+    }},
+    GUI = {{
+        Name = "{variable_name}",
+        Path = "/Labels"
+    }}
+}}
+asset.onInitialize(function()
+    openspace.addSceneGraphNode({position_name});
+    openspace.addSceneGraphNode({variable_name});
+end)
+asset.onDeinitialize(function()
+    openspace.removeSceneGraphNode({variable_name});
+    openspace.removeSceneGraphNode({position_name});
+end)
+asset.export({position_name})
+asset.export({variable_name})
+"""
+
+def make_fade_template_fields(filename_base, fade_targets, target_suffix=""):
+    # The fade command is an action that fades the fade targets out as the camera
+    # approaches this node, and back in as it leaves. Returns the optional fade parts
+    # of the asset templates, all empty if there are no fade targets. target_suffix is
+    # added to each fade target's node name (e.g. "_points").
+    if not fade_targets:
+        return({"fade_command": "", "fade_hooks": "",
+                "register_action": "", "remove_action": ""})
+
+    fade_varname = f"{filename_base}_fade_command"
+    fade_in_lines = "\n".join(
+        f"        openspace.setPropertyValueSingle(\"Scene.{fade_target + target_suffix}.Renderable.Fade\", 0.0, 1.0)"
+        for fade_target in fade_targets)
+    fade_out_lines = "\n".join(
+        f"        openspace.setPropertyValueSingle(\"Scene.{fade_target + target_suffix}.Renderable.Fade\", 1.0, 1.0)"
+        for fade_target in fade_targets)
+
+    return({"fade_command": FADE_COMMAND_TEMPLATE.format(fade_varname=fade_varname,
+                                                         fade_in_lines=fade_in_lines,
+                                                         fade_out_lines=fade_out_lines),
+            "fade_hooks": FADE_HOOKS_TEMPLATE.format(fade_varname=fade_varname),
+            "register_action": f"  openspace.action.registerAction({fade_varname})\n",
+            "remove_action": f"  openspace.action.removeAction({fade_varname})\n"})
+
+def open_output_file(filename, mode, **kwargs):
+    # Opens one of the generated files for writing. An existing file is removed first
+    # rather than truncated in place: with -o, the local copy and the one in the asset
+    # directory are hard links to the same data (see link_or_copy_file_to_dir), so
+    # truncating one of them would also rewrite the other.
+    try:
+        os.unlink(filename)
+    except FileNotFoundError:
+        pass
+    return(open(filename, mode, **kwargs))
+
 def make_stars_speck_from_dataframe(input_points_df, filename_base,
                                     lum, absmag, colorb_v, texnum):
 
     output_speck_filename = args.output_dir + "/" + filename_base + ".speck"
 
-    with open(output_speck_filename, "w") as output_file:
+    # Speck files can be big, so the file is opened in binary mode with a large buffer
+    # and everything is encoded up front, rather than going through the text layer.
+    with open_output_file(output_speck_filename, "wb", buffering=1 << 20) as output_file:
         # Dump the speck file header info. 
-        print("datavar 0 colorb_v", file=output_file)
-        print("datavar 1 lum", file=output_file)
-        print("datavar 2 absmag", file=output_file)
-        print("datavar 3 appmag", file=output_file)
-        print("datavar 4 texnum", file=output_file)
-        print("datavar 5 distly", file=output_file)
-        print("datavar 6 dcalc", file=output_file)
-        print("datavar 7 plx", file=output_file)
-        print("datavar 8 plxerr", file=output_file)
-        print("datavar 9 vx", file=output_file)
-        print("datavar 10 vy", file=output_file)
-        print("datavar 11 vz", file=output_file)
-        print("datavar 12 speed", file=output_file)
-        print("texturevar 4", file=output_file)
-        print("texture -M 1 halo.sgi", file=output_file)
-
-        # Let's add columns for all the data we need to add to the speck file.
-        input_points_df["colorb_v"] = colorb_v
-        input_points_df["lum"] = lum
-        input_points_df["absmag"] = absmag
-        input_points_df["appmag"] = 0.0
-        input_points_df["texnum"] = texnum
-        input_points_df["distly"] = 0.0
-        input_points_df["dcalc"] = 0
-        input_points_df["plx"] = 0.0
-        input_points_df["plxerr"] = 0.0
-        input_points_df["vx"] = 0
-        input_points_df["vy"] = 0
-        input_points_df["vz"] = 0
-        input_points_df["speed"] = 0
-
-        # For each row in the CSV file (pandas dataframe), we will write a line to the output file.
-        num_rows = len(input_points_df)
-        for index, row in input_points_df.iterrows():
-            # Split the line into a list of strings.
-            datavars = []
-
-            datavars.append(str(row["x"]))
-            datavars.append(str(row["y"]))
-            datavars.append(str(row["z"]))
-            
-            datavars.append(str(row["colorb_v"]))
-            #scale_fac = index / num_rows
-            #datavars.append(str(scale_fac))
-
-            datavars.append(str(row["lum"]))
-            datavars.append(str(row["absmag"]))
-            datavars.append(str(row["appmag"]))
-            datavars.append(str(row["texnum"]))
-            datavars.append(str(row["distly"]))
-            datavars.append(str(row["dcalc"]))
-            datavars.append(str(row["plx"]))
-            datavars.append(str(row["plxerr"]))
-            datavars.append(str(row["vx"]))
-            datavars.append(str(row["vy"]))
-            datavars.append(str(row["vz"]))
-            datavars.append(str(row["speed"]))
-
-            # Write the modified line to the output file.
-            output_file.write(" ".join(datavars) + "\n")
+        output_file.write(SPECK_HEADER)
+
+        # Only x, y and z vary from point to point; everything after them (colorb_v
+        # through speed) is the same for every line. So rather than adding 13
+        # constant columns to the dataframe, the constant part is added to the end of
+        # each line of coordinates.
+        speck_line_suffix = (f" {colorb_v} {lum} {absmag} 0.0 {texnum} 0.0 0 0.0 0.0"
+                             " 0 0 0 0\n")
+        # The coordinates are turned into strings by numpy and joined with str.format,
+        # which is about twice as fast as to_csv for this. numpy's astype(str) gives
+        # the shortest text for the float32 values (a plain tolist() would widen them
+        # to Python floats and print every float64 digit), and NaNs come out as "nan".
+        speck_line_format = "{} {} {}" + speck_line_suffix
+        x, y, z = input_points_df[["x", "y", "z"]].to_numpy().astype(str).T.tolist()
+        speck_lines = "".join(map(speck_line_format.format, x, y, z))
+        output_file.write(speck_lines.encode("utf-8"))
 
     # Return the name of the speck file we created.
     return([output_speck_filename])
@@ -139,156 +421,29 @@ def make_stars_asset_from_dataframe(input_points_df,
     output_filename = args.output_dir + "/" + filename_base + ".asset"
     output_asset_position_name = filename_base + "_position"
 
-    with open(output_filename, "w") as output_file:
-        print("local sunspeck = asset.resource({", file=output_file)
-        print("  Name = \"Stars Speck Files\",", file=output_file)
-        print("  Type = \"HttpSynchronization\",", file=output_file)
-        print("  Identifier = \"digitaluniverse_sunstar_speck\",", file=output_file)
-        print("  Version = 1", file=output_file)
-        print("})", file=output_file)
-        print("", file=output_file)
-        """
-        print("local colormaps = asset.resource({", file=output_file)
-        print("  Name = \"Stars Color Table\",", file=output_file)
-        print("  Type = \"HttpSynchronization\",", file=output_file)
-        print("  Identifier = \"stars_colormap\",", file=output_file)
-        print("  Version = 3", file=output_file)
-        print("})", file=output_file)
-        print("", file=output_file)
-        """
-        print("local textures = asset.resource({", file=output_file)
-        print("  Name = \"Stars Textures\",", file=output_file)
-        print("  Type = \"HttpSynchronization\",", file=output_file)
-        print("  Identifier = \"stars_textures\",", file=output_file)
-        print("  Version = 1", file=output_file)
-        print("})", file=output_file)
-        print("", file=output_file)
-
-        # "Declare" fade var so it can be used below.
-        fade_varname = ""
-        if fade_targets:
-            fade_varname = f"{filename_base}_fade_command"
-
-            print(f"local {fade_varname} = {{", file=output_file)
-            print(f"    Identifier = \"{fade_varname}\",", file=output_file)
-            print(f"    Name = \"{fade_varname}\",", file=output_file)
-            print("    Command = [[", file=output_file)
-            print("      openspace.printInfo(\"Node: \" .. args.Node)", file=output_file)
-            print("      openspace.printInfo(\"Transition: \" .. args.Transition)", file=output_file)
-            print("", file=output_file)
-            print("      if args.Transition == \"Approaching\" then", file=output_file)
-            for fade_target in fade_targets:
-                print(f"        openspace.setPropertyValueSingle(\"Scene.{fade_target}.Renderable.Fade\", 0.0, 1.0)", file=output_file)
-            print("      elseif args.Transition == \"Exiting\" then", file=output_file)
-            for fade_target in fade_targets:
-                print(f"        openspace.setPropertyValueSingle(\"Scene.{fade_target}.Renderable.Fade\", 1.0, 1.0)", file=output_file)
-            print("      end", file=output_file)
-            print("    ]],", file=output_file)
-            print("    IsLocal = true", file=output_file)
-            print("}", file=output_file)
-
-        print("local meters_in_pc = 3.0856775814913673e+16", file=output_file)
-        print(f"local {output_asset_position_name} = {{", file=output_file)
-        print(f"    Identifier = \"{output_asset_position_name}\",", file=output_file)
-        print("  Transform = {", file=output_file)
-        print("    Translation = {", file=output_file)
-        print("      Type = \"StaticTranslation\",", file=output_file)
-        print("      Position = {", file=output_file)
-        print(f"        {input_points_world_position["x"]} * meters_in_pc,", file=output_file)
-        print(f"        {input_points_world_position["y"]} * meters_in_pc,", file=output_file)
-        print(f"        {input_points_world_position["z"]} * meters_in_pc,", file=output_file)
-        print("      }", file=output_file)
-        print("     }", file=output_file)
-        print("    },", file=output_file)
-        print("  GUI = {", file=output_file)
-        print(f"    Name = \"{output_asset_position_name}\",", file=output_file)
-        print(f"    Path = \"/Positions\",", file=output_file)
-        print(f"    Hidden = true", file=output_file)
-        print("  }", file=output_file)
-        print("}", file=output_file)
-
-        # Hack - colormap file.
-        cmap_filename = args.output_dir + "/" + filename_base + ".cmap"
-        with open(cmap_filename, "w") as cmap_file:
-            print("# OpenSpace colormap file", file=cmap_file)
-            print("", file=cmap_file)
-            print("5", file=cmap_file)
-            print("1.0 1.0 1.0 0.5", file=cmap_file)
-            print("1.0 0.0 0.0 1.0", file=cmap_file)
-            print("0.0 1.0 0.0 1.0", file=cmap_file)
-            print("0.0 0.0 1.0 1.0", file=cmap_file)
-            print("1.0 1.0 1.0 1.0", file=cmap_file)
-            cmap_file.close()
-
-        print(f"local {filename_base}_speck = asset.resource(\"{filename_base}.speck\")", file=output_file)
-        print(f"local {filename_base}_color = asset.resource(\"{cmap_filename}\")", file=output_file)
-        print("", file=output_file)
-        print(f"local {filename_base} = {{", file=output_file)
-        print(f"  Identifier = \"{filename_base}\",", file=output_file)
-        print(f"  Parent = {output_asset_position_name}.Identifier,", file=output_file)
-        print(f"  Renderable = {{", file=output_file)
-        print("    UseCaching = false,", file=output_file)
-        print("    Type = \"RenderableStars\",", file=output_file)
-        print(f"    File = {filename_base}_speck,", file=output_file)
-        print("    Core = {", file=output_file)
-        print("      Texture = textures .. \"glare.png\",", file=output_file)
-        print(f"      Multiplier = {core_multiplier},", file=output_file)
-        print(f"      Gamma = {core_gamma},", file=output_file)
-        print(f"      Scale = {core_scale}", file=output_file)
-        print("    },", file=output_file)
-        print("    Glare = {", file=output_file)
-        print("      Texture = textures .. \"halo.png\",", file=output_file)
-        print(f"      Multiplier = {glare_multiplier},", file=output_file)
-        print(f"      Gamma = {glare_gamma},", file=output_file)
-        print(f"      Scale = {glare_scale}", file=output_file)
-        print("    },", file=output_file)
-        print(f"    MagnitudeExponent = {magnitude_exponent},", file=output_file)
-        print(f"    ColorMap = {filename_base}_color,", file=output_file)
-        print("     ColorOption = \"Other Data\",", file=output_file)
-        print("    OtherData = \"texnum\",", file=output_file)
-        print(f"    OtherDataColorMap = {filename_base}_color,", file=output_file)
-        print(f"    OtherDataValueRange = {{ 0.0, 4.0 }},", file=output_file)
-        print("    SizeComposition = \"Distance Modulus\",", file=output_file)
-        print("    DataMapping = {", file=output_file)
-        print("      Bv = \"colorb_v\",", file=output_file)
-        print("      Luminance = \"lum\",", file=output_file)
-        print("      AbsoluteMagnitude = \"absmag\",", file=output_file)
-        print("      ApparentMagnitude = \"appmag\",", file=output_file)
-        print("      Vx = \"vx\",", file=output_file)
-        print("      Vy = \"vy\",", file=output_file)
-        print("      Vz = \"vz\",", file=output_file)
-        print("      Speed = \"speed\"", file=output_file)
-        print("    },", file=output_file)
-        print("    DimInAtmosphere = true", file=output_file)
-        print("  },", file=output_file)
-        print("    InteractionSphere = 1 * meters_in_pc,", file=output_file)
-        print("    ApproachFactor = 1000.0,", file=output_file)
-        print("    ReachFactor = 5.0,", file=output_file)
-        print("", file=output_file)
-        if fade_targets:
-            print(f"    OnApproach = {{ \"{fade_varname}\" }},", file=output_file)
-            print(f"    OnReach = {{ \"{fade_varname}\" }},", file=output_file)
-            print(f"    OnRecede = {{ \"{fade_varname}\" }},", file=output_file)
-            print(f"    OnExit = {{ \"{fade_varname}\" }},", file=output_file)
-        print("  GUI = {", file=output_file)
-        print(f"    Name = \"{filename_base}\",", file=output_file)
-        print(f"    Path = \"/Stars\",", file=output_file)
-        print("  }", file=output_file)
-        print("}", file=output_file)
-        print("asset.onInitialize(function()", file=output_file)
-        if fade_targets:
-            print(f"  openspace.action.registerAction({fade_varname})", file=output_file)
-        print(f"  openspace.addSceneGraphNode({output_asset_position_name})", file=output_file)
-        print(f"  openspace.addSceneGraphNode({filename_base})", file=output_file)
-        print("end)", file=output_file)
-        print("asset.onDeinitialize(function()", file=output_file)
-        print(f"  openspace.removeSceneGraphNode({filename_base})", file=output_file)
-        print(f"  openspace.removeSceneGraphNode({output_asset_position_name})", file=output_file)
-        if fade_targets:
-            print(f"  openspace.action.removeAction({fade_varname})", file=output_file)
-        print("end)", file=output_file)
-        print(f"asset.export({output_asset_position_name})", file=output_file)
-        print(f"asset.export({filename_base})", file=output_file)
+    # Hack - colormap file.
+    cmap_filename = args.output_dir + "/" + filename_base + ".cmap"
+    cmap_local_filename = os.path.basename(cmap_filename)
+    with open_output_file(cmap_filename, "w") as cmap_file:
+        cmap_file.write(STARS_CMAP)
+
+    fade_fields = make_fade_template_fields(filename_base, fade_targets)
+    with open_output_file(output_filename, "w") as output_file:
+        output_file.write(STARS_ASSET_TEMPLATE.format(
+            base=filename_base,
+            position_name=output_asset_position_name,
+            x=input_points_world_position["x"],
+            y=input_points_world_position["y"],
+            z=input_points_world_position["z"],
+            cmap_filename=cmap_local_filename,
+            core_multiplier=core_multiplier,
+            core_gamma=core_gamma,
+            core_scale=core_scale,
+            glare_multiplier=glare_multiplier,
+            glare_gamma=glare_gamma,
+            glare_scale=glare_scale,
+            magnitude_exponent=magnitude_exponent,
+            **fade_fields))
 
     # Return the name of the asset file we created.
     return([output_filename, cmap_filename])
@@ -304,8 +459,9 @@ def make_points_asset_and_csv_from_dataframe(input_points_df,
     # add a color column. If specified, we need to look at the color_by_column and
     # figure out how many unique values there are in that column. We'll assign a color
     # index between 1 and whatever the number of unique values is. We'll then use a
-    # colormap to assign a color to each index.
-    if str(color_by_column) != "nan":
+    # colormap to assign a color to each index. color_by_column is optional; if it's
+    # blank in the dataset CSV file, it's a NaN.
+    if not pd.isna(color_by_column):
         unique_values = input_points_df[color_by_column].unique()
         num_unique_values = len(unique_values)
         color_index = 1
@@ -326,34 +482,27 @@ def make_points_asset_and_csv_from_dataframe(input_points_df,
     # Now a color file, since we know how many colors we need.
     color_filename = args.output_dir + "/" + filename_base + ".cmap"
     color_local_filename = os.path.basename(color_filename)
-    with open(color_filename, "w") as color_file:
-        print("# OpenSpace colormap file", file=color_file)
-        print("", file=color_file)
-        #print(f"{num_unique_values}", file=color_file)
-        #for value in unique_values:
-        #    print(f"1.0 0.0 0.0 1.0", file=color_file)
-        print("2", file=color_file)
-        print("0.0 0.0 1.0 1.0", file=color_file)
-        print("0.0 1.0 0.0 1.0", file=color_file)
-        #print("0.0 0.0 1.0 1.0", file=color_file)
-        color_file.close()
+    with open_output_file(color_filename, "w") as color_file:
+        color_file.write(POINTS_CMAP)
     output_files.append(color_filename)
 
     # Now write the CSV file.
     points_csv_filename = args.output_dir + "/" + filename_base + "_points.csv"
     # Local filename is just the filename with no path.
     local_points_csv_filename = os.path.basename(points_csv_filename)
-    with open(points_csv_filename, "w") as output_file:
-        if color_by_column:
-            print(f"x,y,z,color,{color_by_column}", file=output_file)
-        else:
-            print("x,y,z", file=output_file)
-        for index, row in input_points_df.iterrows():
-            if color_by_column:
-                print(f"{row['x']},{row['y']},{row['z']},{row['color']},{row['color_by_column']}", file=output_file)
-            else:
-                print(f"{row['x']},{row['y']},{row['z']}", file=output_file)
-        output_file.close()
+    # Like the speck file, this is written in binary mode with a large buffer, and the
+    # rows are formatted all at once by to_csv rather than one by one.
+    if color_by_column:
+        header = f"x,y,z,color,{color_by_column}\n"
+        points_columns = ["x", "y", "z", "color", "color_by_column"]
+    else:
+        header = "x,y,z\n"
+        points_columns = ["x", "y", "z"]
+    points_lines = input_points_df[points_columns].to_csv(header=False, index=False,
+                                                          na_rep="nan",
+                                                          lineterminator="\n")
+    with open_output_file(points_csv_filename, "wb", buffering=1 << 20) as output_file:
+        output_file.write((header + points_lines).encode("utf-8"))
 
     output_files.append(points_csv_filename)
 
@@ -362,91 +511,18 @@ def make_points_asset_and_csv_from_dataframe(input_points_df,
     output_asset_filename = args.output_dir + "/" + filename_base + "_points.asset"
     output_asset_variable_name = filename_base + "_points"
     output_asset_position_name = output_asset_variable_name + "_position"
-    with open(output_asset_filename, "w") as output_file:
-
-        # "Declare" fade var so it can be used below.
-        fade_varname = ""
-        if fade_targets:
-            fade_varname = f"{filename_base}_fade_command"
-
-            print(f"local {fade_varname} = {{", file=output_file)
-            print(f"    Identifier = \"{fade_varname}\",", file=output_file)
-            print(f"    Name = \"{fade_varname}\",", file=output_file)
-            print("    Command = [[", file=output_file)
-            print("      openspace.printInfo(\"Node: \" .. args.Node)", file=output_file)
-            print("      openspace.printInfo(\"Transition: \" .. args.Transition)", file=output_file)
-            print("", file=output_file)
-            print("      if args.Transition == \"Approaching\" then", file=output_file)
-            # This is pretty hacky - adding in the _points suffix...
-            for fade_target in fade_targets:
-                print(f"        openspace.setPropertyValueSingle(\"Scene.{fade_target + "_points"}.Renderable.Fade\", 0.0, 1.0)", file=output_file)
-            print("      elseif args.Transition == \"Exiting\" then", file=output_file)
-            for fade_target in fade_targets:
-                print(f"        openspace.setPropertyValueSingle(\"Scene.{fade_target + "_points"}.Renderable.Fade\", 1.0, 1.0)", file=output_file)
-            print("      end", file=output_file)
-            print("    ]],", file=output_file)
-            print("    IsLocal = true", file=output_file)
-            print("}", file=output_file)
-
-        print("local meters_in_pc = 3.0856775814913673e+16", file=output_file)
-        print(f"local {output_asset_position_name} = {{", file=output_file)
-        print(f"    Identifier = \"{output_asset_position_name}\",", file=output_file)
-        print("  Transform = {", file=output_file)
-        print("    Translation = {", file=output_file)
-        print("      Type = \"StaticTranslation\",", file=output_file)
-        print("      Position = {", file=output_file)
-        print(f"        {input_points_world_position["x"]} * meters_in_pc,", file=output_file)
-        print(f"        {input_points_world_position["y"]} * meters_in_pc,", file=output_file)
-        print(f"        {input_points_world_position["z"]} * meters_in_pc,", file=output_file)
-        print("      }", file=output_file)
-        print("     }", file=output_file)
-        print("    },", file=output_file)
-        print("  GUI = {", file=output_file)
-        print(f"    Name = \"{output_asset_position_name}\",", file=output_file)
-        print(f"    Path = \"/Points\",", file=output_file)
-        print(f"    Hidden = true", file=output_file)
-        print("  }", file=output_file)
-        print(" }", file=output_file)
-
-        print(f"local {output_asset_variable_name} = {{", file=output_file)
-        print(f"    Identifier = \"{output_asset_variable_name}\",", file=output_file)
-        print(f"    Parent = {output_asset_position_name}.Identifier,", file=output_file)
-        print("    Renderable = {", file=output_file)
-        print("        Type = \"RenderablePointCloud\",", file=output_file)
-        print(f"        File = asset.resource(\"{local_points_csv_filename}\"),", file=output_file)
-        print("         Texture = { File = asset.resource(\"point3A.png\") },", file=output_file)
-        print("         Unit = \"pc\",", file=output_file)
-        #print(f"        Coloring = {{ FixedColor = {{ 1.0, 0.0, 0.0 }} }},", file=output_file)
-        print(f"        Coloring = {{ ColorMapping = {{ File = asset.resource(\"{color_local_filename}\"),", file=output_file)
-        print(f"                                      Parameter = \"color\" }} }},", file=output_file)
-        print("    },", file=output_file)
-        print("    InteractionSphere = 1 * meters_in_pc,", file=output_file)
-        print("    ApproachFactor = 1000.0,", file=output_file)
-        print("    ReachFactor = 5.0,", file=output_file)
-        if fade_targets:
-            print(f"    OnApproach = {{ \"{fade_varname}\" }},", file=output_file)
-            print(f"    OnReach = {{ \"{fade_varname}\" }},", file=output_file)
-            print(f"    OnRecede = {{ \"{fade_varname}\" }},", file=output_file)
-            print(f"    OnExit = {{ \"{fade_varname}\" }},", file=output_file)
-        print("    GUI = {", file=output_file)
-        print(f"        Name = \"{output_asset_variable_name}\",", file=output_file)
-        print(f"        Path = \"/Points\"", file=output_file)
-        print("    }", file=output_file)
-        print("}", file=output_file)
-        print("asset.onInitialize(function()", file=output_file)
-        if fade_targets:
-            print(f"  openspace.action.registerAction({fade_varname})", file=output_file)
-        print(f"    openspace.addSceneGraphNode({output_asset_position_name});", file=output_file)
-        print(f"    openspace.addSceneGraphNode({output_asset_variable_name});", file=output_file)
-        print("end)", file=output_file)
-        print("asset.onDeinitialize(function()", file=output_file)
-        print(f"    openspace.removeSceneGraphNode({output_asset_variable_name});", file=output_file)
-        print(f"    openspace.removeSceneGraphNode({output_asset_position_name});", file=output_file)
-        if fade_targets:
-            print(f"  openspace.action.removeAction({fade_varname})", file=output_file)
-        print("end)", file=output_file)
-        print(f"asset.export({output_asset_position_name})", file=output_file)
-        print(f"asset.export({output_asset_variable_name})", file=output_file)
+    # This is pretty hacky - adding in the _points suffix to the fade targets...
+    fade_fields = make_fade_template_fields(filename_base, fade_targets, target_suffix="_points")
+    with open_output_file(output_asset_filename, "w") as output_file:
+        output_file.write(POINTS_ASSET_TEMPLATE.format(
+            variable_name=output_asset_variable_name,
+            position_name=output_asset_position_name,
+            x=input_points_world_position["x"],
+            y=input_points_world_position["y"],
+            z=input_points_world_position["z"],
+            points_csv_filename=local_points_csv_filename,
+            color_filename=color_local_filename,
+            **fade_fields))
 
 
     output_files.append(output_asset_filename)
@@ -461,9 +537,20 @@ def make_labels_from_dataframe(input_points_df,
 
     label_filename = args.output_dir + "/" + filename_base + "_" + label_column + ".label"
     local_label_filename = os.path.basename(label_filename)
-    with open(label_filename, "w") as output_file:
-        for index, row in input_points_df.iterrows():
-            print(f"{row['x']} {row['y']} {row['z']} id {index} text {row[label_column]}", file=output_file)
+    with open_output_file(label_filename, "wb", buffering=1 << 20) as output_file:
+        # Build all the label lines at once as a Series of strings, rather than
+        # formatting each row with iterrows(), and write them in one go. Like the
+        # speck file, this is written in binary mode with a large buffer.
+        # Missing values (blank labels are common) are written as "nan". Older
+        # pandas already gives "nan" from astype(str), but pandas 3 keeps them
+        # missing, so they're filled in explicitly.
+        if len(input_points_df) > 0:
+            index_str = input_points_df.index.astype(str)
+            lines = (input_points_df["x"].astype(str).fillna("nan") + " " +
+                     input_points_df["y"].astype(str).fillna("nan") + " " +
+                     input_points_df["z"].astype(str).fillna("nan") + " id " + index_str +
+                     " text " + input_points_df[label_column].astype(str).fillna("nan"))
+            output_file.write(("\n".join(lines.to_numpy()) + "\n").encode("utf-8"))
 
     output_files.append(label_filename)
 
@@ -472,55 +559,18 @@ def make_labels_from_dataframe(input_points_df,
     output_asset_filename = args.output_dir + "/" + filename_base + "_" + label_column + ".asset"
     output_asset_variable_name = filename_base + "_" + label_column + "_labels"
     output_asset_position_name = output_asset_variable_name + "_position"
-    with open(output_asset_filename, "w") as output_file:
-        print("local meters_in_pc = 3.0856775814913673e+16", file=output_file)
-        print(f"local {output_asset_position_name} = {{", file=output_file)
-        print(f"    Identifier = \"{output_asset_position_name}\",", file=output_file)
-        print("  Transform = {", file=output_file)
-        print("    Translation = {", file=output_file)
-        print("      Type = \"StaticTranslation\",", file=output_file)
-        print("      Position = {", file=output_file)
-        print(f"        {input_points_world_position["x"]} * meters_in_pc,", file=output_file)
-        print(f"        {input_points_world_position["y"]} * meters_in_pc,", file=output_file)
-        print(f"        {input_points_world_position["z"]} * meters_in_pc,", file=output_file)
-        print("      }", file=output_file)
-        print("     }", file=output_file)
-        print("    },", file=output_file)
-        print("  GUI = {", file=output_file)
-        print(f"    Name = \"{output_asset_position_name}\",", file=output_file)
-        print(f"    Path = \"/Positions\",", file=output_file)
-        print(f"    Hidden = true", file=output_file)
-        print("  }", file=output_file)
-        print(" }", file=output_file)
-
-        print(f"local {output_asset_variable_name} = {{", file=output_file)
-        print(f"    Identifier = \"{output_asset_variable_name}\",", file=output_file)
-        print(f"    Parent = {output_asset_position_name}.Identifier,", file=output_file)
-        print("    Renderable = {", file=output_file)
-        print("        Type = \"RenderablePointCloud\",", file=output_file)
-        print("        Labels = {", file=output_file)
-        print(f"            File = asset.resource(\"{local_label_filename}\"),", file=output_file)
-        print(f"            Enabled = {enabled},", file=output_file)
-        print("            Unit = \"pc\",", file=output_file)
-        print(f"            Size = {label_size},", file=output_file)
-        print(f"            MinMaxSize = {{ {label_minsize},{label_maxsize} }}", file=output_file)
-        print("        }", file=output_file)
-        print("    },", file=output_file)
-        print("    GUI = {", file=output_file)
-        print(f"        Name = \"{output_asset_variable_name}\",", file=output_file)
-        print(f"        Path = \"/Labels\"", file=output_file)
-        print("    }", file=output_file)
-        print("}", file=output_file)
-        print("asset.onInitialize(function()", file=output_file)
-        print(f"    openspace.addSceneGraphNode({output_asset_position_name});", file=output_file)
-        print(f"    openspace.addSceneGraphNode({output_asset_variable_name});", file=output_file)
-        print("end)", file=output_file)
-        print("asset.onDeinitialize(function()", file=output_file)
-        print(f"    openspace.removeSceneGraphNode({output_asset_variable_name});", file=output_file)
-        print(f"    openspace.removeSceneGraphNode({output_asset_position_name});", file=output_file)
-        print("end)", file=output_file)
-        print(f"asset.export({output_asset_position_name})", file=output_file)
-        print(f"asset.export({output_asset_variable_name})", file=output_file)
+    with open_output_file(output_asset_filename, "w") as output_file:
+        output_file.write(LABELS_ASSET_TEMPLATE.format(
+            variable_name=output_asset_variable_name,
+            position_name=output_asset_position_name,
+            x=input_points_world_position["x"],
+            y=input_points_world_position["y"],
+            z=input_points_world_position["z"],
+            label_filename=local_label_filename,
+            enabled=enabled,
+            label_size=label_size,
+            label_minsize=label_minsize,
+            label_maxsize=label_maxsize))
 
 
     output_files.append(output_asset_filename)
@@ -572,12 +622,214 @@ def make_group_labels_from_dataframe(input_points_df,
 
     return(output_files)
 
+def copy_file_to_dir(src, dst_dir):
+    # Copies src into dst_dir, keeping its metadata, like shutil.copy2(). Where it's
+    # available (Linux), os.copy_file_range() is tried first. It copies entirely in
+    # the kernel and can share blocks on filesystems with reflinks (Btrfs, XFS),
+    # which helps with the big speck files. Anything it can't handle, e.g. copying
+    # between filesystems on older kernels, falls back to shutil.copy2(). So does a
+    # copy that stops short: some filesystems just return 0 from copy_file_range()
+    # rather than an error, which would otherwise leave a truncated file behind.
+    dst = os.path.join(dst_dir, os.path.basename(src))
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+                remaining = os.fstat(src_file.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src_file.fileno(), dst_file.fileno(),
+                                                remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                shutil.copystat(src, dst)
+                return(dst)
+        except OSError:
+            pass
+    return(shutil.copy2(src, dst))
+
+def link_or_copy_file_to_dir(src, dst_dir):
+    # Puts src into dst_dir as a hard link, so the local copy and the one in the asset
+    # directory are the same file and no data is copied at all. If that's not possible
+    # (different filesystems, or one without hard links), the file is copied instead.
+    dst = os.path.join(dst_dir, os.path.basename(src))
+    try:
+        if os.path.lexists(dst):
+            os.unlink(dst)
+        os.link(src, dst)
+        return(dst)
+    except OSError:
+        return(copy_file_to_dir(src, dst_dir))
+
+def process_row(row):
+    # Creates the speck, label and asset files for one row of the dataset CSV
+    # file, returning the list of files created. This is run in a worker
+    # process, so only the (small) dataset row is passed in and the points CSV
+    # file is read here.
+    files_created = []
+
+    # Progress is printed as one line per row once the row is done, since rows
+    # are processed in parallel and partial lines would interleave.
+    status = "Reading file: " + row["csv_file"] + "... "
+
+    # Only the columns that are actually used are parsed: the coordinates, plus the
+    # label column for labels and the color column (if any) for points.
+    usecols = ["x", "y", "z"]
+    if row["type"] in ("labels", "group_labels"):
+        usecols.append(row["label_column"])
+    elif row["type"] == "points" and not pd.isna(row["color_by_column"]):
+        usecols.append(row["color_by_column"])
+
+    input_points_df = pd.read_csv(row["csv_file"], usecols=usecols,
+                                  **points_csv_options)
+    # The pyarrow engine gives missing strings as None rather than NaN. Make them NaN
+    # so they come out the same way in the output files whichever engine is used.
+    if points_csv_engine == "pyarrow":
+        input_points_df = input_points_df.fillna(np.nan)
+    
+    # The fade_targets argument is optional. If it's blank, it's a NaN rather than
+    # a string; pd.isna() checks for that whatever the type is.
+    fade_targets = None
+    if not pd.isna(row["fade_targets"]):
+        # There may be more than one fade target, separated by commas.
+        fade_targets = row["fade_targets"].split(",")
+
+    # Let's get the base of the filename (no extension) to use for generating
+    # output files.
+    filename_base = row["csv_file"].replace(".csv", "")
+
+    # All points are originally in world coordinates. A problem with this is we
+    # need to be able to point the camera to certain locations, such as the center
+    # of a set of points. To do this, we need to translate the points so that the
+    # centroid of the points is locally at 0,0,0, and then move that whole set of
+    # points to its original location using a transform.
+    # The centroid is computed for all three columns in a single mean() call. The
+    # world position is only ever written into asset files, so it's formatted once
+    # here, with repr(), which round-trips exactly (the same text every run for the
+    # same input).
+    centroid = input_points_df[["x", "y", "z"]].mean()
+    input_points_world_position = {}
+    input_points_world_position["x"] = repr(float(centroid["x"]))
+    input_points_world_position["y"] = repr(float(centroid["y"]))
+    input_points_world_position["z"] = repr(float(centroid["z"]))
+    #print("Centroid (world position of center of points): ", input_points_world_position)
+
+    # Translate all the points so that the new centroid of the points is 0,0,0. This
+    # is done in place on a single numpy array of the three columns, which is then
+    # put back in the dataframe. (The centroid itself still comes from pandas'
+    # mean(), which skips NaNs.) The array is asked for as a copy: with pandas'
+    # copy-on-write, to_numpy() can otherwise hand back a read-only view of the
+    # dataframe's own data.
+    xyz = input_points_df[["x", "y", "z"]].to_numpy(dtype=np.float64, copy=True)
+    xyz -= centroid.to_numpy()
+    # Once the points are centred, they're stored as float32. OpenSpace keeps point
+    # positions as 32-bit floats anyway, so no precision that survives into the
+    # renderer is lost, and it halves the data that the writers below have to go
+    # through. (This has to come after centring: the raw world coordinates are
+    # large enough that float32 would visibly move points that are close together.)
+    input_points_df[["x", "y", "z"]] = xyz.astype(np.float32)
+
+    if row["type"] == "labels":
+        status += "Creating labels... "
+        # Let's do the labels first. The following functions modify the original
+        # dataframe, adding lots of columns for the speck file, but making labels
+        # doesn't. So we can do this first.
+        # "enabled" is wonky. It is 1 or 0 in the CSV file, we need to change
+        # it to true or false.
+        if row["enabled"] == 1:
+            row["enabled"] = "true"
+        else:
+            row["enabled"] = "false"
+        files_created += \
+            make_labels_from_dataframe(input_points_df=input_points_df,
+                                       input_points_world_position=input_points_world_position,
+                                       filename_base=filename_base,
+                                       label_column=row["label_column"],
+                                       label_size=row["label_size"],
+                                       label_minsize=row["label_minsize"],
+                                       label_maxsize=row["label_maxsize"],
+                                       enabled=row["enabled"])
+        
+    elif row["type"] == "points":
+        status += "Creating points... "
+        files_created += \
+            make_points_asset_and_csv_from_dataframe(input_points_df=input_points_df, 
+                                                     input_points_world_position=input_points_world_position,
+                                                     filename_base=filename_base,
+                                                     fade_targets=fade_targets,
+                                                     color_by_column=row["color_by_column"])
+        
+    # Datasets contain many points that fall into common groupings, such as phyla,
+    # classes, kingdoms, etc. Rather than have many points with the same label, we
+    # can create a single label for the group that sits in the middle of all these
+    # points. This is useful for large datasets where the labels would otherwise
+    # overlap.
+    elif row["type"] == "group_labels":
+        status += "Creating group labels... "
+        # Same thing as above, for enabled.
+        if row["enabled"] == 1:
+            row["enabled"] = "true"
+        else:
+            row["enabled"] = "false"
+        files_created += \
+            make_group_labels_from_dataframe(input_points_df=input_points_df,
+                                             input_points_world_position=input_points_world_position,
+                                             filename_base=filename_base,
+                                             label_column=row["label_column"],
+                                             label_size=row["label_size"],
+                                             label_minsize=row["label_minsize"],
+                                             label_maxsize=row["label_maxsize"],
+                                             enabled=row["enabled"])
+
+
+
+    elif row["type"] == "stars":
+        status += "Creating stars... "
+        # Now the speck file. This is what RenderableStars will use to draw the
+        # points. The speck file doesn't care about the centroid; the translation
+        # to "world" space is applied by the renderable.
+        files_created += \
+            make_stars_speck_from_dataframe(input_points_df=input_points_df, 
+                                            filename_base=filename_base,
+                                            lum=row["lum"], 
+                                            absmag=row["absmag"],
+                                            colorb_v=row["colorb_v"],
+                                            texnum=row["texnum"])
+
+        # Now an asset file that will be used to load the speck file into OpenSpace.
+        files_created += \
+            make_stars_asset_from_dataframe(input_points_df=input_points_df, 
+                                            input_points_world_position=input_points_world_position,
+                                            filename_base=filename_base,
+                                            magnitude_exponent=row["MagnitudeExponent"],
+                                            core_multiplier=row["core_multiplier"],
+                                            core_gamma=row["core_gamma"],
+                                            core_scale=row["core_scale"],
+                                            glare_multiplier=row["glare_multiplier"],
+                                            glare_gamma=row["glare_gamma"],
+                                            glare_scale=row["glare_scale"],
+                                            fade_targets=fade_targets)
+    print(status + "Done.", flush=True)
+
+    return(files_created)
+
+def process_rows(rows):
+    # Rows that share a CSV file write to some of the same output files (the
+    # .cmap, for instance), so they are processed together, in order, by one
+    # worker.
+    files_created = []
+    for row in rows:
+        files_created += process_row(row)
+    return(files_created)
+
 def main():
-    # If an output directory was specified, make sure it exists.
-    if args.output_dir != ".":
-        Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    # Make sure the output directory exists. (This is the asset directory, unless a
+    # separate output directory was given.)
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
 
-    # Read the dataset CSV file into a pandas dataframe.
+    # Read the dataset CSV file into a pandas dataframe. This one is small and has
+    # comments in it, which the pyarrow engine doesn't support, so it uses the
+    # default engine.
     input_dataset_df = pd.read_csv(args.input_dataset_csv_file, 
                                    comment="#")
 
@@ -587,150 +839,56 @@ def main():
     files_created = []
 
     # Now run the functions to create the speck and asset files for each csv
-    # file in the dataset csv file.
-    for index, row in input_dataset_df.iterrows():
-        print("Reading file: " + row["csv_file"] + "... ", end="", flush=True)
-
-        input_points_df = pd.read_csv(row["csv_file"])
-        # The first column might be unnamed. It's basically the ID, so we'll
-        # call it that for now.
-        input_points_df.rename(columns={input_points_df.columns[0]: "ID"},
-                                inplace=True)
-        
-        # The fade_targets argument is optional. If it's blank, it's a NaN, which
-        # is weird to test for if it might be a string. So convert it.
-        fade_targets = None
-        if (str(row["fade_targets"]) != "nan"):
-            # There may be more than one fade target, separated by commas.
-            fade_targets = row["fade_targets"].split(",")
-
-        # Let's get the base of the filename (no extension) to use for generating
-        # output files.
-        filename_base = row["csv_file"].replace(".csv", "")
-
-        # All points are originally in world coordinates. A problem with this is we
-        # need to be able to point the camera to certain locations, such as the center
-        # of a set of points. To do this, we need to translate the points so that the
-        # centroid of the points is locally at 0,0,0, and then move that whole set of
-        # points to its original location using a transform.
-        input_points_world_position = {}
-        input_points_world_position["x"] = input_points_df["x"].mean()
-        input_points_world_position["y"] = input_points_df["y"].mean()
-        input_points_world_position["z"] = input_points_df["z"].mean()
-        #print("Centroid (world position of center of points): ", input_points_world_position)
-
-        # Translate all the points so that the new centroid of the points is 0,0,0.
-        input_points_df["x"] = input_points_df["x"] - input_points_world_position["x"]
-        input_points_df["y"] = input_points_df["y"] - input_points_world_position["y"]
-        input_points_df["z"] = input_points_df["z"] - input_points_world_position["z"]
-
-        if row["type"] == "labels":
-            print("Creating labels... ", end="", flush=True)
-            # Let's do the labels first. The following functions modify the original
-            # dataframe, adding lots of columns for the speck file, but making labels
-            # doesn't. So we can do this first.
-            # "enabled" is wonky. It is 1 or 0 in the CSV file, we need to change
-            # it to true or false.
-            if row["enabled"] == 1:
-                row["enabled"] = "true"
-            else:
-                row["enabled"] = "false"
-            files_created += \
-                make_labels_from_dataframe(input_points_df=input_points_df,
-                                           input_points_world_position=input_points_world_position,
-                                           filename_base=filename_base,
-                                           label_column=row["label_column"],
-                                           label_size=row["label_size"],
-                                           label_minsize=row["label_minsize"],
-                                           label_maxsize=row["label_maxsize"],
-                                           enabled=row["enabled"])
-            
-        elif row["type"] == "points":
-            print("Creating points... ", end="", flush=True)
-            files_created += \
-                make_points_asset_and_csv_from_dataframe(input_points_df=input_points_df, 
-                                                         input_points_world_position=input_points_world_position,
-                                                         filename_base=filename_base,
-                                                         fade_targets=fade_targets,
-                                                         color_by_column=row["color_by_column"])
-            
-        # Datasets contain many points that fall into common groupings, such as phyla,
-        # classes, kingdoms, etc. Rather than have many points with the same label, we
-        # can create a single label for the group that sits in the middle of all these
-        # points. This is useful for large datasets where the labels would otherwise
-        # overlap.
-        elif row["type"] == "group_labels":
-            print("Creating group labels... ", end="", flush=True)
-            # Same thing as above, for enabled.
-            if row["enabled"] == 1:
-                row["enabled"] = "true"
-            else:
-                row["enabled"] = "false"
-            files_created += \
-                make_group_labels_from_dataframe(input_points_df=input_points_df,
-                                                 input_points_world_position=input_points_world_position,
-                                                 filename_base=filename_base,
-                                                 label_column=row["label_column"],
-                                                 label_size=row["label_size"],
-                                                 label_minsize=row["label_minsize"],
-                                                 label_maxsize=row["label_maxsize"],
-                                                 enabled=row["enabled"])
-
-
-
-        elif row["type"] == "stars":
-            print("Creating stars... ", end="", flush=True)
-            # Now the speck file. This is what RenderableStars will use to draw the
-            # points. The speck file doesn't care about the centroid; the translation
-            # to "world" space is applied by the renderable.
-            files_created += \
-                make_stars_speck_from_dataframe(input_points_df=input_points_df, 
-                                                filename_base=filename_base,
-                                                lum=row["lum"], 
-                                                absmag=row["absmag"],
-                                                colorb_v=row["colorb_v"],
-                                                texnum=row["texnum"])
-
-            # Now an asset file that will be used to load the speck file into OpenSpace.
-            files_created += \
-                make_stars_asset_from_dataframe(input_points_df=input_points_df, 
-                                                input_points_world_position=input_points_world_position,
-                                                filename_base=filename_base,
-                                                magnitude_exponent=row["MagnitudeExponent"],
-                                                core_multiplier=row["core_multiplier"],
-                                                core_gamma=row["core_gamma"],
-                                                core_scale=row["core_scale"],
-                                                glare_multiplier=row["glare_multiplier"],
-                                                glare_gamma=row["glare_gamma"],
-                                                glare_scale=row["glare_scale"],
-                                                fade_targets=fade_targets)
-        print("Done.")
-
-    # Now we need to make a list of all the .asset and .speck files we created
-    # so these can be flushed from the cache directory.
-    print("Cleaning cache directory...", end="", flush=True)
-    for file in files_created:
-        # Get just the filename, not the path.
-        file = os.path.basename(file)
-        # Ignore any errors if the file doesn't exist.
-        try:
+    # file in the dataset csv file. Each csv file is independent of the others,
+    # so they are handed out to a pool of worker processes. All the rows for a
+    # given csv file go to the same worker.
+    rows_by_csv_file = {}
+    for row in input_dataset_df.to_dict("records"):
+        rows_by_csv_file.setdefault(row["csv_file"], []).append(row)
+
+    # There's no point starting more workers than there are csv files.
+    num_workers = max(1, min(len(rows_by_csv_file), os.cpu_count() or 1))
+    with multiprocessing.Pool(num_workers) as pool:
+        for files in pool.imap_unordered(process_rows, rows_by_csv_file.values()):
+            files_created += files
+
+    # Now go through all the .asset and .speck (etc.) files we created. Each one is
+    # flushed from the cache directory, if it's in there, and then copied to the
+    # asset directory, unless it was written there in the first place. Some files
+    # (the .cmap) can be created by more than one row, so duplicates are dropped
+    # first.
+    cache_dir = Path(args.cache_dir)
+    asset_dir = Path(args.asset_dir)
+    copy_to_asset_dir = Path(args.output_dir).resolve() != asset_dir.resolve()
+    if copy_to_asset_dir:
+        print(f"Cleaning cache directory and copying files to asset directory ({args.asset_dir}).")
+        asset_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        print("Cleaning cache directory...", end="", flush=True)
+    # Read the cache directory once, rather than checking for each file separately.
+    try:
+        cached_entries = {entry.name: entry for entry in os.scandir(cache_dir)}
+    except FileNotFoundError:
+        cached_entries = {}
+    for file in dict.fromkeys(files_created):
+        # The cached copy has the same name as the file, without the path.
+        cached_entry = cached_entries.get(os.path.basename(file))
+        if cached_entry is not None:
             if args.verbose:
-                print(f"Removing {args.cache_dir + '/' + file}")
-            shutil.rmtree(args.cache_dir + "/" + file)
-        except FileNotFoundError:
-            pass
-        # Notify all other exceptions.
-        except Exception as e:
-            print(f"Error removing file {args.cache_dir + '/' + file}: {e}")
-    print("Done.")
-    
-    # Now copy the speck and asset files to the output directory.
-    print(f"Copying files to output directory ({args.asset_dir}).")
-    Path(args.asset_dir).mkdir(parents=True, exist_ok=True)
-    for file in files_created:
-        if args.verbose:
-            print(f"{file} ", end="", flush=True)
-        shutil.copy2(file, args.asset_dir)
+                print(f"Removing {cached_entry.path}")
+            try:
+                if cached_entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(cached_entry.path)
+                else:
+                    os.unlink(cached_entry.path)
+            # Notify, but carry on, if it can't be removed.
+            except OSError as e:
+                print(f"Error removing file {cached_entry.path}: {e}")
+
+        if copy_to_asset_dir:
+            if args.verbose:
+                print(f"{file} ", end="", flush=True)
+            link_or_copy_file_to_dir(file, asset_dir)
     print("Done.")
 
 if __name__ == '__main__':